@@ -0,0 +1,61 @@
+"""
+ONNX Runtime encoder for the filename embedding model.
+
+Loading the full sentence-transformers / torch stack costs seconds of
+startup; an int8 ONNX export (produced once by scripts/export_model.py)
+loads in a fraction of that and runs faster on CPU. This module wraps an
+onnxruntime session in the small slice of the SentenceTransformer.encode
+API that SearchEngine actually uses, so the engine can swap between the
+two transparently.
+"""
+
+import numpy as np
+
+from settings import MODEL_CACHE_DIR, ONNX_MODEL_FILE
+
+
+class OnnxEncoder:
+    """
+    Drop-in encoder backed by an ONNX export of the model.
+
+    Raises ImportError / OSError from the constructor if onnxruntime,
+    the tokenizer files, or the exported model are unavailable — callers
+    are expected to fall back to sentence-transformers.
+    """
+
+    def __init__(self):
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(MODEL_CACHE_DIR)
+        self.session = onnxruntime.InferenceSession(
+            ONNX_MODEL_FILE, providers=['CPUExecutionProvider']
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True,
+               normalize_embeddings=False, show_progress_bar=False):
+        """Encode sentences; mirrors SentenceTransformer.encode semantics."""
+        outputs = []
+        for start in range(0, len(sentences), batch_size):
+            batch = sentences[start:start + batch_size]
+            tokens = self.tokenizer(batch, padding=True, truncation=True,
+                                    max_length=128, return_tensors='np')
+            feed = {k: v.astype(np.int64) for k, v in tokens.items()
+                    if k in self._input_names}
+            token_embeddings = self.session.run(None, feed)[0]
+
+            # Mean pooling over non-padding tokens, as in the original
+            # sentence-transformers pipeline.
+            attention_mask = tokens['attention_mask'][..., np.newaxis].astype(np.float32)
+            summed = (token_embeddings * attention_mask).sum(axis=1)
+            counts = np.clip(attention_mask.sum(axis=1), 1e-9, None)
+            outputs.append(summed / counts)
+
+        embeddings = np.concatenate(outputs, axis=0) if outputs else np.zeros((0, 384), dtype=np.float32)
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-9, None)
+
+        return embeddings
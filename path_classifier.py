@@ -9,6 +9,7 @@ with ML-based classifiers in the future.
 import os
 import re
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from settings import (
     EXCLUDED_PATTERNS,
     EXCLUDED_EXTENSIONS,
@@ -20,6 +21,29 @@ from settings import (
     EXCLUDED_PATHS,
 )
 
+# Precomputed lowercase forms of the settings lists. matches_excluded_pattern
+# runs once per filesystem entry during indexing, so lowercasing these on
+# every call would dominate the scan.
+_EXCLUDED_PATHS_LC = tuple(p.lower() for p in EXCLUDED_PATHS)
+_EXCLUDED_PATTERNS_LC = tuple(p.lower() for p in EXCLUDED_PATTERNS)
+_EXCLUDED_EXT_LC = frozenset(e.lower() for e in EXCLUDED_EXTENSIONS)
+
+
+@lru_cache(maxsize=100_000)
+def _dir_components_excluded(dir_lower: str) -> bool:
+    """
+    Check the directory components of a path against excluded patterns.
+
+    Every file in a directory shares this result, and during a scan the
+    classifier sees the same parent over and over, so memoizing it turns
+    the component scan into a single dict lookup per file.
+    """
+    for part in dir_lower.split('\\'):
+        for pattern in _EXCLUDED_PATTERNS_LC:
+            if pattern in part:
+                return True
+    return False
+
 
 class PathClassifierBase(ABC):
     """Abstract base class for path classifiers."""
@@ -37,41 +61,50 @@ class PathClassifierBase(ABC):
         """
         pass
     
-    def matches_excluded_pattern(self, path: str) -> bool:
+    def matches_excluded_pattern(self, path: str, path_lower: str = None,
+                                 parts_lower: list = None) -> bool:
         """
         Check if path matches any excluded pattern.
-        
+
         Args:
             path: Full file/folder path
-            
+            path_lower: Optional pre-lowercased path (avoids recomputing
+                when the caller already has it)
+            parts_lower: Optional pre-split lowercase path components
+
         Returns:
             True if path should be excluded
         """
-        path_lower = path.lower()
-        
-        # Check absolute excluded paths
-        for excluded in EXCLUDED_PATHS:
-            if path_lower.startswith(excluded.lower()):
-                return True
+        if path_lower is None:
+            path_lower = path.lower()
 
-        path_parts = path_lower.replace('/', '\\').split('\\')
-        filename = os.path.basename(path)
+        # Check absolute excluded paths (startswith accepts a tuple natively)
+        if path_lower.startswith(_EXCLUDED_PATHS_LC):
+            return True
+
+        if parts_lower is None:
+            parts_lower = path_lower.replace('/', '\\').split('\\')
+        dir_lower = '\\'.join(parts_lower[:-1])
+        name_lower = parts_lower[-1] if parts_lower else ''
 
         # Check hidden files/folders
-        if filename.startswith('.'):
+        if name_lower.startswith('.'):
             return True
-        
-        # Check each path component against patterns
-        for part in path_parts:
-            for pattern in EXCLUDED_PATTERNS:
-                if pattern.lower() in part:
-                    return True
-        
+
+        # Check path components against patterns: the parent-directory
+        # part is memoized (shared by every entry in the directory), only
+        # the basename is scanned fresh.
+        if _dir_components_excluded(dir_lower):
+            return True
+        for pattern in _EXCLUDED_PATTERNS_LC:
+            if pattern in name_lower:
+                return True
+
         # Check file extension
-        _, ext = os.path.splitext(path_lower)
-        if ext in [e.lower() for e in EXCLUDED_EXTENSIONS]:
+        _, ext = os.path.splitext(name_lower)
+        if ext in _EXCLUDED_EXT_LC:
             return True
-            
+
         return False
 
 
@@ -93,63 +126,94 @@ class HeuristicClassifier(PathClassifierBase):
     
     def __init__(self, threshold: float = RELEVANCE_THRESHOLD):
         self.threshold = threshold
-        self._negative_regex = [re.compile(p, re.IGNORECASE) for p in self.NEGATIVE_PATTERNS]
+        # Single alternation so one .match() call covers all patterns
+        # instead of one Python-level regex call per pattern per file.
+        # Prefer google-re2 when installed: its DFA matches in linear
+        # time instead of backtracking through the alternation.
+        pattern = '|'.join(f'(?:{p})' for p in self.NEGATIVE_PATTERNS)
+        # The stdlib pattern is always kept: re2 requires valid UTF-8 and
+        # raises at match time on names with unpaired surrogates, which
+        # stdlib re matches fine (see _matches_negative_pattern).
+        self._negative_regex_re = re.compile(pattern, re.IGNORECASE)
+        try:
+            import re2
+            # google-re2 takes an Options object, not integer flags.
+            # Any re2 failure (import, options, compile) must fall back
+            # to stdlib re — this runs inside SearchEngine startup.
+            opts = re2.Options()
+            opts.case_sensitive = False
+            self._negative_regex = re2.compile(pattern, options=opts)
+        except Exception:
+            self._negative_regex = self._negative_regex_re
+
+    def _matches_negative_pattern(self, name: str) -> bool:
+        """
+        Check a name against the generated-name patterns.
+
+        Prefers the re2 engine when available, but re2 only accepts
+        valid UTF-8 — a name containing an unpaired surrogate (legal on
+        NTFS, and the surrogateescape form of undecodable POSIX names)
+        raises at match time, so those fall back to the stdlib pattern.
+        """
+        try:
+            return self._negative_regex.match(name) is not None
+        except (UnicodeEncodeError, ValueError):
+            return self._negative_regex_re.match(name) is not None
     
     def is_relevant(self, path: str) -> bool:
         """
         Determine if path is relevant using heuristic scoring.
-        
+
         Returns True if the path should be indexed.
         """
+        # Lowercase and split once; both checks below reuse the results.
+        path_lower = path.lower()
+        parts_lower = path_lower.replace('/', '\\').split('\\')
+
         # First check excluded patterns (hard filter)
-        if self.matches_excluded_pattern(path):
+        if self.matches_excluded_pattern(path, path_lower, parts_lower):
             return False
-        
+
         # Calculate relevance score
-        score = self._calculate_score(path)
+        score = self._calculate_score(path, parts_lower)
         return score >= self.threshold
-    
-    def _calculate_score(self, path: str) -> float:
+
+    def _calculate_score(self, path: str, parts_lower: list = None) -> float:
         """
         Calculate a relevance score for the path.
-        
+
         Score ranges from 0.0 (not relevant) to 1.0 (highly relevant).
         """
         score = 0.5  # Start neutral
-        
-        path_parts = path.replace('/', '\\').split('\\')
-        filename = path_parts[-1] if path_parts else ''
-        name_lower = filename.lower()
-        name_without_ext = os.path.splitext(name_lower)[0]
-        _, ext = os.path.splitext(name_lower)
-        
+
+        if parts_lower is None:
+            parts_lower = path.lower().replace('/', '\\').split('\\')
+        name_lower = parts_lower[-1] if parts_lower else ''
+        name_without_ext, ext = os.path.splitext(name_lower)
+
         # Positive: Good extension
         if ext in POSITIVE_EXTENSIONS:
             score += 0.2
-        
+
         # Positive: Meaningful name
         if name_without_ext in POSITIVE_NAMES:
             score += 0.15
-        
+
         # Positive: In user-friendly folder
-        for folder in POSITIVE_FOLDERS:
-            if folder in [p.lower() for p in path_parts]:
-                score += 0.1
-                break
-        
+        if not POSITIVE_FOLDERS.isdisjoint(parts_lower):
+            score += 0.1
+
         # Negative: Hidden files/folders (starting with .)
-        if filename.startswith('.'):
+        if name_lower.startswith('.'):
             score -= 0.3
-        
+
         # Negative: Very deep nesting (more than 8 levels)
-        if len(path_parts) > 8:
+        if len(parts_lower) > 8:
             score -= 0.1
         
         # Negative: Looks like generated/hash name
-        for regex in self._negative_regex:
-            if regex.match(name_without_ext):
-                score -= 0.3
-                break
+        if self._matches_negative_pattern(name_without_ext):
+            score -= 0.3
         
         # Negative: Very short or very long names
         if len(name_without_ext) < 2:
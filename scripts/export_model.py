@@ -0,0 +1,68 @@
+"""
+One-time export of the embedding model to quantized ONNX.
+
+Run this after the first app start (so the model is in data/model), or
+standalone — it will download the model if needed. Produces
+data/model/miniLM-int8.onnx, which search_engine.py loads through
+onnx_encoder.OnnxEncoder instead of the full torch stack: startup drops
+from seconds to hundreds of milliseconds and CPU inference gets the
+int8 speedup.
+"""
+
+import os
+import sys
+
+import torch
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.append(project_root)
+
+from settings import MODEL_CACHE_DIR, ONNX_MODEL_FILE
+
+
+def export_model():
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    if os.path.exists(MODEL_CACHE_DIR):
+        print(f"Loading model from local cache: {MODEL_CACHE_DIR}")
+        model = SentenceTransformer(MODEL_CACHE_DIR)
+    else:
+        print("Downloading model...")
+        model = SentenceTransformer('all-MiniLM-L6-v2')
+        print(f"Saving model to local cache: {MODEL_CACHE_DIR}")
+        model.save(MODEL_CACHE_DIR)
+
+    # The transformer backbone is the first module; pooling/normalization
+    # are reimplemented in onnx_encoder.py on the numpy side.
+    transformer = model[0].auto_model
+    transformer.eval()
+    tokenizer = model.tokenizer
+
+    dummy = tokenizer(['example filename.txt'], return_tensors='pt',
+                      padding=True, truncation=True, max_length=128)
+    input_names = [n for n in ('input_ids', 'attention_mask', 'token_type_ids') if n in dummy]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['token_embeddings'] = {0: 'batch', 1: 'sequence'}
+
+    fp32_path = ONNX_MODEL_FILE.replace('int8', 'fp32')
+    print(f"Exporting ONNX graph to {fp32_path}")
+    torch.onnx.export(
+        transformer,
+        tuple(dummy[n] for n in input_names),
+        fp32_path,
+        input_names=input_names,
+        output_names=['token_embeddings'],
+        dynamic_axes=dynamic_axes,
+        opset_version=14,
+    )
+
+    print(f"Quantizing to int8: {ONNX_MODEL_FILE}")
+    quantize_dynamic(fp32_path, ONNX_MODEL_FILE, weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    print(f"Done. Exported model at {ONNX_MODEL_FILE}")
+
+
+if __name__ == '__main__':
+    export_model()
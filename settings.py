@@ -5,9 +5,16 @@ All configurable patterns and options are defined here.
 import os
 # Data paths
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
-CACHE_FILE = os.path.join(DATA_DIR, 'search_cache.pkl')
+# Index cache: a small JSON header (row count, dim, dtype), the raw
+# embedding rows (appendable), and newline-delimited JSON path metadata.
+CACHE_HEADER_FILE = os.path.join(DATA_DIR, 'cache_header.json')
+EMBEDDINGS_FILE = os.path.join(DATA_DIR, 'embeddings.bin')
+PATHS_FILE = os.path.join(DATA_DIR, 'paths.jsonl')
 LOG_FILE = os.path.join(DATA_DIR, 'embeddings_log.txt')
 MODEL_CACHE_DIR = os.path.join(DATA_DIR, 'model')
+# Quantized ONNX export of the model (see scripts/export_model.py).
+# Loaded in preference to sentence-transformers when present.
+ONNX_MODEL_FILE = os.path.join(MODEL_CACHE_DIR, 'miniLM-int8.onnx')
 
 # Application ID for Windows Taskbar grouping
 APP_ID = 'mittshah.localsemanticsearch.gui.1.0'
@@ -113,6 +120,10 @@ RELEVANCE_THRESHOLD = 0.5  # Score threshold for heuristic classifier
 # Search settings
 SEARCH_TOP_K = 5  # Number of results to return
 
+# Indexing settings
+SCAN_WORKERS = 8  # Threads for the parallel filesystem walk
+ENCODE_BATCH_SIZE = 256  # Filenames per model batch (default 32 is wasteful for short texts)
+
 # Positive signals for heuristic classifier
 POSITIVE_EXTENSIONS = {
     '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',